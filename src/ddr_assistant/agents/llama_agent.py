@@ -1,13 +1,90 @@
 import os
 import io
-import base64
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import aclosing
+from typing import AsyncIterator, Iterator, List
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 from PIL import Image
 from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 from ddr_assistant.prompts.chat_prompts import SYSTEM_PROMPT, IMAGE_ANALYSIS_PROMPT
 from ddr_assistant.tools.db_tools import query_drilling_db, get_db_schema
 from ddr_assistant.utils.guardrails import GuardrailManager
 
+MAX_HISTORY_CHARS = 4000
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL_SECONDS = 600
+TOOL_CACHE_SIZE = 128
+TOOL_CACHE_TTL_SECONDS = 300
+MAX_TOOL_RESULT_CHARS = 4096
+KEEP_RECENT_TOOL_RESULTS = 2
+MAX_IMAGE_DIM = 1024
+_SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
+_TOOLS = {
+    "query_drilling_db": query_drilling_db,
+    "get_db_schema": get_db_schema,
+}
+_TOOL_LIST = list(_TOOLS.values())
+
+_LLM = None
+_LLM_WITH_TOOLS = None
+_LOOP = None
+_SINGLETON_LOCK = threading.Lock()
+# Shared across sessions: a hit needs the same history, so only identical conversation prefixes reuse an answer.
+_RESPONSE_CACHE = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+def _get_llm_with_tools():
+    global _LLM, _LLM_WITH_TOOLS
+    with _SINGLETON_LOCK:
+        if _LLM_WITH_TOOLS is None:
+            _LLM = ChatGroq(
+                model_name="llama-3.1-8b-instant",
+                groq_api_key=os.environ["GROQ_API_KEY"],
+                temperature=0.1
+            )
+            _LLM_WITH_TOOLS = _LLM.bind_tools(_TOOL_LIST)
+        return _LLM, _LLM_WITH_TOOLS
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    global _LOOP
+    with _SINGLETON_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="llama-agent-loop", daemon=True).start()
+        return _LOOP
+
+def _cap_tool_result(result: str) -> str:
+    if len(result) <= MAX_TOOL_RESULT_CHARS:
+        return result
+    half = MAX_TOOL_RESULT_CHARS // 2
+    head = result[:half].rsplit("\n", 1)[0]
+    tail = result[-half:].split("\n", 1)[-1]
+    return f"{head}\n... [{len(result) - len(head) - len(tail)} chars truncated] ...\n{tail}"
+
+def _elide_stale_tool_results(messages: list) -> None:
+    # Results after the latest AIMessage answer its tool calls and are always kept.
+    seen = 0
+    current_round = True
+    for msg in reversed(messages):
+        if isinstance(msg, AIMessage):
+            current_round = False
+        if not isinstance(msg, ToolMessage):
+            continue
+        seen += 1
+        if not current_round and seen > KEEP_RECENT_TOOL_RESULTS and not msg.content.startswith("[Prior tool result:"):
+            msg.content = f"[Prior tool result: {len(msg.content)} chars, elided]"
+
 class LlamaAgent:
     def __init__(self):
         self.vlm = ChatGroq(
@@ -15,26 +92,71 @@ class LlamaAgent:
             groq_api_key=os.environ["GROQ_API_KEY"],
             temperature=0.3,
         )
-        self.llm = ChatGroq(
-            model_name="llama-3.1-8b-instant",
-            groq_api_key=os.environ["GROQ_API_KEY"],
-            temperature=0.1
-        )
-        self.tools = {
-            "query_drilling_db": query_drilling_db,
-            "get_db_schema": get_db_schema,
-        }
-        self.llm_with_tools = self.llm.bind_tools(list(self.tools.values()))
+        self.llm, self.llm_with_tools = _get_llm_with_tools()
+        self.tools = _TOOLS
         self.messages = []
+        self._formatted_history = deque()
+        self._history_chars = 0
         self.guardrails = GuardrailManager()
+        self._b64_cache = None
+        self._tool_cache = OrderedDict()
         
         if "LANGCHAIN_PROJECT" not in os.environ:
             os.environ["LANGCHAIN_PROJECT"] = "ddr-assistant"
 
-    def _image_to_base64(self, image: Image.Image) -> str:
-        buffered = io.BytesIO()
-        image.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode()
+    def _image_to_data_url(self, image: Image.Image) -> str:
+        # One slot: re-analysing the current upload hits, older images in history do not pin their URLs.
+        cached = self._b64_cache
+        if cached is not None and cached[0]() is image:
+            return cached[1]
+
+        is_photo = image.format == "JPEG"
+        encoded_image = image
+        if max(image.size) > MAX_IMAGE_DIM:
+            encoded_image = image.copy()
+            encoded_image.thumbnail((MAX_IMAGE_DIM, MAX_IMAGE_DIM), Image.Resampling.LANCZOS)
+
+        with io.BytesIO() as buffered:
+            if is_photo:
+                if encoded_image.mode not in ("RGB", "L"):
+                    encoded_image = encoded_image.convert("RGB")
+                encoded_image.save(buffered, format="JPEG", quality=85, optimize=False)
+                mime_type = "image/jpeg"
+            else:
+                encoded_image.save(buffered, format="PNG", optimize=False, compress_level=1)
+                mime_type = "image/png"
+            with buffered.getbuffer() as view:
+                payload = base64.b64encode(view)
+        data_url = f"data:{mime_type};base64,{payload.decode('ascii')}"
+
+        self._b64_cache = (weakref.ref(image), data_url)
+        return data_url
+
+    def _tool_cache_key(self, tool_name: str, args: dict) -> tuple:
+        if tool_name == "query_drilling_db" and isinstance(args.get("query"), str):
+            # Only trim the ends; whitespace inside string literals is part of the query.
+            query = args["query"].strip().rstrip(";").strip()
+            args = {**args, "query": query}
+        return tool_name, json.dumps(args, sort_keys=True, default=str)
+
+    async def _ainvoke_tool(self, tool_call: dict) -> str:
+        tool_name = tool_call["name"]
+        if tool_name not in self.tools:
+            return f"Error: Tool {tool_name} not found."
+
+        key = self._tool_cache_key(tool_name, tool_call["args"])
+        cached = self._tool_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < TOOL_CACHE_TTL_SECONDS:
+            self._tool_cache.move_to_end(key)
+            return cached[1]
+
+        result = str(await self.tools[tool_name].ainvoke(tool_call["args"]))
+        if not result.startswith("Error"):
+            self._tool_cache[key] = (time.monotonic(), result)
+            self._tool_cache.move_to_end(key)
+            if len(self._tool_cache) > TOOL_CACHE_SIZE:
+                self._tool_cache.popitem(last=False)
+        return result
 
     def add_message(self, role: str, content: str, image: Image.Image = None):
         msg = {"role": role, "content": content}
@@ -42,8 +164,31 @@ class LlamaAgent:
             msg["image"] = image
         self.messages.append(msg)
 
+        message_cls = HumanMessage if role == "user" else AIMessage
+        self._formatted_history.append(message_cls(content=content))
+        self._history_chars += len(content)
+        if self._history_chars > MAX_HISTORY_CHARS:
+            self._trim_history()
+
+    def _trim_history(self):
+        # Drop down to half the budget in one step so the retained prefix
+        # stays identical for several turns instead of sliding every turn.
+        while self._formatted_history and self._history_chars > MAX_HISTORY_CHARS // 2:
+            dropped = self._formatted_history.popleft()
+            self._history_chars -= len(dropped.content)
+
     def clear_history(self):
         self.messages = []
+        self._formatted_history = deque()
+        self._history_chars = 0
+        self._tool_cache.clear()
+
+    def _response_cache_key(self, history: list, user_message: str) -> bytes:
+        digest = hashlib.blake2b(SYSTEM_PROMPT.encode(), digest_size=16)
+        for msg in history:
+            digest.update(f"\x00{msg.type}\x00{msg.content}".encode())
+        digest.update(f"\x00human\x00{user_message}".encode())
+        return digest.digest()
 
     def analyze_image(self, image: Image.Image, user_prompt: str = "") -> str:
         try:
@@ -52,11 +197,11 @@ class LlamaAgent:
                 if not is_safe:
                     return message
 
-            img_base64 = self._image_to_base64(image)
+            image_url = self._image_to_data_url(image)
             prompt = user_prompt if user_prompt else IMAGE_ANALYSIS_PROMPT
             messages = [HumanMessage(content=[
                 {"type": "text", "text": prompt},
-                {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{img_base64}"}}
+                {"type": "image_url", "image_url": {"url": image_url}}
             ])]
             response = self.vlm.invoke(messages).content
             
@@ -66,47 +211,174 @@ class LlamaAgent:
             return f"Error: {e}"
 
     def chat(self, user_message: str) -> str:
+        return asyncio.run_coroutine_threadsafe(self.achat(user_message), _get_event_loop()).result()
+
+    async def achat(self, user_message: str) -> str:
+        return "".join([chunk async for chunk in self._arespond(user_message, stream=False)])
+
+    def chat_stream(self, user_message: str) -> Iterator[str]:
+        loop = _get_event_loop()
+        stream = self.achat_stream(user_message)
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(stream.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            # Streamlit closes this generator when a rerun interrupts write_stream.
+            asyncio.run_coroutine_threadsafe(stream.aclose(), loop).result()
+
+    def batch_chat(
+        self,
+        user_messages: List[str],
+        batch_size: int = 8,
+        delay_between_batches: float = 0.0,
+    ) -> List[str]:
+        coro = self.abatch_chat(user_messages, batch_size, delay_between_batches)
+        return asyncio.run_coroutine_threadsafe(coro, _get_event_loop()).result()
+
+    async def abatch_chat(
+        self,
+        user_messages: List[str],
+        batch_size: int = 8,
+        delay_between_batches: float = 0.0,
+    ) -> List[str]:
+        results = [None] * len(user_messages)
+
+        for start in range(0, len(user_messages), batch_size):
+            if start and delay_between_batches:
+                await asyncio.sleep(delay_between_batches)
+
+            pending = {}
+            for idx in range(start, min(start + batch_size, len(user_messages))):
+                is_safe, validation_msg = self.guardrails.validate_input(user_messages[idx])
+                if is_safe:
+                    pending[idx] = [_SYSTEM_MESSAGE, HumanMessage(content=user_messages[idx])]
+                else:
+                    results[idx] = validation_msg
+
+            for _ in range(5):
+                if not pending:
+                    break
+                responses = await self.llm_with_tools.abatch(
+                    list(pending.values()),
+                    config={"max_concurrency": batch_size},
+                    return_exceptions=True,
+                )
+
+                tool_jobs = []
+                for idx, response in zip(list(pending), responses):
+                    if isinstance(response, Exception):
+                        results[idx] = f"Error: {response}"
+                        del pending[idx]
+                    elif not response.tool_calls:
+                        final_content = response.content or "I'm sorry, I couldn't generate a response."
+                        results[idx] = self.guardrails.validate_output(final_content)[1]
+                        del pending[idx]
+                    else:
+                        pending[idx].append(response)
+                        tool_jobs.extend((idx, tc) for tc in response.tool_calls)
+
+                tool_results = await asyncio.gather(*[self._ainvoke_tool(tc) for _, tc in tool_jobs])
+                for (idx, tool_call), tool_result in zip(tool_jobs, tool_results):
+                    pending[idx].append(ToolMessage(content=_cap_tool_result(tool_result), tool_call_id=tool_call["id"]))
+                for idx in {idx for idx, _ in tool_jobs}:
+                    _elide_stale_tool_results(pending[idx])
+
+            for idx in pending:
+                results[idx] = "Tool execution limit reached."
+
+        return results
+
+    async def achat_stream(self, user_message: str) -> AsyncIterator[str]:
+        async with aclosing(self._arespond(user_message, stream=True)) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def _arespond(self, user_message: str, stream: bool) -> AsyncIterator[str]:
         is_safe, validation_msg = self.guardrails.validate_input(user_message)
         if not is_safe:
-            return validation_msg
+            yield validation_msg
+            return
+
+        history = list(self._formatted_history)
+        cache_key = self._response_cache_key(history, user_message)
+        with _RESPONSE_CACHE_LOCK:
+            cached = _RESPONSE_CACHE.get(cache_key)
+            if cached is not None and time.monotonic() - cached[0] < RESPONSE_CACHE_TTL_SECONDS:
+                _RESPONSE_CACHE.move_to_end(cache_key)
+            else:
+                cached = None
+        if cached is not None:
+            self.add_message("user", user_message)
+            self.add_message("assistant", cached[1])
+            yield cached[1]
+            return
 
         self.add_message("user", user_message)
+        streamed = []
         
         try:
-            history_text = "\n".join([f"{m['role'].capitalize()}: {m['content']}" for m in self.messages[:-1]])
-            history_snippet = history_text[-1000:] if len(history_text) > 1000 else history_text
-            
-            full_system_prompt = f"{SYSTEM_PROMPT}\n\n[Recent History Context]\n...{history_snippet}"
-            active_messages = [SystemMessage(content=full_system_prompt), HumanMessage(content=user_message)]
+            fallback = None
+            active_messages = [_SYSTEM_MESSAGE, *history, HumanMessage(content=user_message)]
 
             for _ in range(5):
-                response = self.llm_with_tools.invoke(active_messages)
+                if stream:
+                    response = None
+                    # Keep text from earlier rounds apart from this one, as it was shown.
+                    separator = "\n\n" if streamed else ""
+                    async for chunk in self.llm_with_tools.astream(active_messages):
+                        response = chunk if response is None else response + chunk
+                        if chunk.content:
+                            text = separator + chunk.content
+                            separator = ""
+                            streamed.append(text)
+                            yield text
+                else:
+                    response = await self.llm_with_tools.ainvoke(active_messages)
                 active_messages.append(response)
 
                 if not response.tool_calls:
-                    final_content = response.content
+                    if not response.content:
+                        fallback = "I'm sorry, I couldn't generate a response."
+                    elif not stream:
+                        streamed.append(response.content)
+                        yield response.content
                     break
 
-                for tool_call in response.tool_calls:
-                    tool_name = tool_call["name"]
-                    if tool_name not in self.tools:
-                        tool_result = f"Error: Tool {tool_name} not found."
-                    else:
-                        tool_func = self.tools[tool_name]
-                        tool_result = tool_func.invoke(tool_call["args"])
-                    active_messages.append(ToolMessage(content=str(tool_result), tool_call_id=tool_call["id"]))
+                results = await asyncio.gather(*[self._ainvoke_tool(tc) for tc in response.tool_calls])
+                for tool_call, tool_result in zip(response.tool_calls, results):
+                    active_messages.append(ToolMessage(content=_cap_tool_result(tool_result), tool_call_id=tool_call["id"]))
+                _elide_stale_tool_results(active_messages)
             else:
-                final_content = "Tool execution limit reached."
-            
-            if not final_content:
-                final_content = "I'm sorry, I couldn't generate a response."
+                fallback = "Tool execution limit reached."
 
+            if fallback:
+                text = f"\n\n{fallback}" if streamed else fallback
+                streamed.append(text)
+                yield text
+
+            final_content = "".join(streamed)
             _, safe_final_content = self.guardrails.validate_output(final_content)
+
+            # Answers that carry text from tool-call rounds are only valid for the stream that showed them.
+            if fallback is None and final_content == response.content:
+                with _RESPONSE_CACHE_LOCK:
+                    _RESPONSE_CACHE[cache_key] = (time.monotonic(), safe_final_content)
+                    _RESPONSE_CACHE.move_to_end(cache_key)
+                    if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+                        _RESPONSE_CACHE.popitem(last=False)
             
             self.add_message("assistant", safe_final_content)
-            return safe_final_content
 
+        except (GeneratorExit, asyncio.CancelledError):
+            # Keep user and assistant turns paired even when the reader stops early.
+            self.add_message("assistant", "".join(streamed))
+            raise
         except Exception as e:
             error_msg = f"Error: {e}"
-            self.add_message("assistant", error_msg)
-            return error_msg
\ No newline at end of file
+            if streamed:
+                error_msg = f"\n\n{error_msg}"
+            self.add_message("assistant", "".join(streamed) + error_msg)
+            yield error_msg
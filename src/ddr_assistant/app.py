@@ -27,8 +27,20 @@ if "initialized" not in st.session_state:
 if "pending_image" not in st.session_state:
     st.session_state.pending_image = None
 
-db_manager = DatabaseManager()
-batch_processor = BatchProcessor(DATA_DIR, db_manager)
+if "uploaded_image" not in st.session_state:
+    st.session_state.uploaded_image = None
+    st.session_state.uploaded_file_id = None
+
+@st.cache_resource
+def get_db_manager() -> DatabaseManager:
+    return DatabaseManager()
+
+@st.cache_resource
+def get_batch_processor(data_dir: Path) -> BatchProcessor:
+    return BatchProcessor(data_dir, get_db_manager())
+
+db_manager = get_db_manager()
+batch_processor = get_batch_processor(DATA_DIR)
 agent = st.session_state.agent
 
 def initialize_data():
@@ -71,7 +83,11 @@ with st.sidebar:
     uploaded_file = st.file_uploader("Choose an image", type=["png", "jpg", "jpeg"])
 
     if uploaded_file:
-        image = Image.open(uploaded_file)
+        # Reruns hand back the same upload; reuse the opened image so its encoding stays cached.
+        if st.session_state.uploaded_file_id != uploaded_file.file_id:
+            st.session_state.uploaded_image = Image.open(uploaded_file)
+            st.session_state.uploaded_file_id = uploaded_file.file_id
+        image = st.session_state.uploaded_image
         st.image(image, caption="Preview", use_container_width=True)
         st.session_state.pending_image = image
 
@@ -81,13 +97,11 @@ with st.sidebar:
                 agent.add_message("user", f"[Image: {uploaded_file.name}]", image)
                 agent.add_message("assistant", f"**Analysis:**\n\n{analysis}")
                 st.session_state.pending_image = None
-                st.rerun()
 
     st.divider()
 
     if st.button("Clear Chat History"):
         agent.clear_history()
-        st.rerun()
 
 st.title("DDR Assistant Chat")
 
@@ -111,14 +125,10 @@ if prompt := st.chat_input("Ask a question..."):
         agent.add_message("user", prompt, st.session_state.pending_image)
         agent.add_message("assistant", f"**Analysis:**\n\n{analysis}")
         st.session_state.pending_image = None
-        st.rerun()
     else:
         with st.chat_message("user"):
             st.markdown(prompt)
 
         with st.chat_message("assistant"):
             with st.spinner("Thinking..."):
-                response = agent.chat(prompt)
-                st.markdown(response)
-        
-        st.rerun()
\ No newline at end of file
+                st.write_stream(agent.chat_stream(prompt))
\ No newline at end of file
@@ -1,9 +1,11 @@
 """Configuration package for DDR Assistant."""
 
-from .database import DatabaseConfig, get_db_connection, init_database
+from .database import ConnectionPool, DatabaseConfig, get_db_connection, get_pooled_connection, init_database
 
 __all__ = [
+    "ConnectionPool",
     "DatabaseConfig",
     "get_db_connection",
+    "get_pooled_connection",
     "init_database",
 ]
@@ -1,6 +1,10 @@
+import atexit
+import os
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Generator, Optional
 
@@ -13,6 +17,10 @@ class DatabaseConfig:
     enable_foreign_keys: bool = True
     journal_mode: str = "WAL"
     synchronous: str = "NORMAL"
+    cache_size: int = -20000
+    temp_store: str = "MEMORY"
+    read_only: bool = False
+    mmap_size: int = 268435456
     
     def __post_init__(self):
         if isinstance(self.db_path, str):
@@ -23,22 +31,123 @@ def get_db_connection(config: Optional[DatabaseConfig] = None) -> sqlite3.Connec
     if config is None:
         config = DatabaseConfig()
     
+    if config.read_only:
+        database = f"{config.db_path.resolve().as_uri()}?mode=ro"
+    else:
+        database = str(config.db_path)
+
     conn = sqlite3.connect(
-        str(config.db_path),
+        database,
         timeout=config.timeout,
         check_same_thread=config.check_same_thread,
         isolation_level=config.isolation_level,
+        uri=config.read_only,
     )
     
     cursor = conn.cursor()
     if config.enable_foreign_keys:
         cursor.execute("PRAGMA foreign_keys = ON")
-    cursor.execute(f"PRAGMA journal_mode = {config.journal_mode}")
-    cursor.execute(f"PRAGMA synchronous = {config.synchronous}")
+    if config.read_only:
+        cursor.execute("PRAGMA query_only = ON")
+        cursor.execute(f"PRAGMA mmap_size = {config.mmap_size}")
+    else:
+        cursor.execute(f"PRAGMA journal_mode = {config.journal_mode}")
+        cursor.execute(f"PRAGMA synchronous = {config.synchronous}")
+    cursor.execute(f"PRAGMA cache_size = {config.cache_size}")
+    cursor.execute(f"PRAGMA temp_store = {config.temp_store}")
     conn.row_factory = sqlite3.Row
     cursor.close()
     return conn
 
+_TLS = threading.local()
+_POOLED_CONNECTIONS: list = []
+_POOL_LOCK = threading.Lock()
+
+def get_pooled_connection(config: Optional[DatabaseConfig] = None) -> sqlite3.Connection:
+    if config is None:
+        config = DatabaseConfig()
+
+    conns = getattr(_TLS, "conns", None)
+    if conns is None:
+        conns = _TLS.conns = {}
+
+    key = (str(config.db_path), config.read_only)
+    conn = conns.get(key)
+    if conn is None:
+        conn = get_db_connection(config)
+        conns[key] = conn
+        with _POOL_LOCK:
+            _POOLED_CONNECTIONS.append(conn)
+    return conn
+
+@atexit.register
+def _close_pooled_connections() -> None:
+    with _POOL_LOCK:
+        for conn in _POOLED_CONNECTIONS:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _POOLED_CONNECTIONS.clear()
+
+class ConnectionPool:
+    def __init__(self, config: Optional[DatabaseConfig] = None, read_pool_size: Optional[int] = None):
+        self.config = config or DatabaseConfig()
+        self._read_config = replace(self.config, read_only=True)
+        self._write_conn = get_db_connection(self.config)
+        self._write_lock = threading.RLock()
+        self._read_pool = queue.Queue(maxsize=read_pool_size or os.cpu_count() or 4)
+
+    @contextmanager
+    def writer(self) -> Generator[sqlite3.Connection, None, None]:
+        with self._write_lock:
+            conn = self._write_conn
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            if conn.in_transaction:
+                conn.commit()
+
+    @contextmanager
+    def reader(self) -> Generator[sqlite3.Connection, None, None]:
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            conn = get_db_connection(self._read_config)
+        try:
+            yield conn
+        finally:
+            try:
+                self._read_pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def optimize(self) -> None:
+        with self._write_lock:
+            conn = self._write_conn
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+
+    def close(self) -> None:
+        with self._write_lock:
+            try:
+                self._write_conn.execute("PRAGMA optimize")
+            finally:
+                self._write_conn.close()
+        while True:
+            try:
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
+
 @contextmanager
 def db_session(config: Optional[DatabaseConfig] = None) -> Generator[sqlite3.Connection, None, None]:
     conn = get_db_connection(config)
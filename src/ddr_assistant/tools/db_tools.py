@@ -1,30 +1,74 @@
+import csv
+import io
+import logging
 import sqlite3
-import pandas as pd
-from typing import Optional
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Optional, Sequence
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
-from ddr_assistant.config import DatabaseConfig, get_db_connection
+from ddr_assistant.config import DatabaseConfig, get_pooled_connection
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULT_ROWS = 10
 
 class SQLQuery(BaseModel):
     query: str = Field(description="A valid SQLite SELECT query")
+    include_total: bool = Field(default=False, description="Also count all matching rows when the result is truncated")
+
+def _to_csv(columns: List[str], rows: Sequence[Sequence]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue().rstrip("\n")
+
+def _count_rows(conn: sqlite3.Connection, query: str) -> Optional[int]:
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM ({query.strip().rstrip(';')})").fetchone()[0]
+    except sqlite3.Error:
+        return None
 
 @tool(args_schema=SQLQuery)
-def query_drilling_db(query: str) -> str:
+def query_drilling_db(query: str, include_total: bool = False) -> str:
     """Execute a SQL SELECT query against the drilling reports database."""
     try:
-        config = DatabaseConfig()
-        conn = get_db_connection(config)
-        df = pd.read_sql_query(query, conn)
-        conn.close()
-        print(f"Query: {query}")
-        if df.empty:
+        config = DatabaseConfig(read_only=True)
+        conn = get_pooled_connection(config)
+        cursor = conn.execute(query)
+        rows = cursor.fetchmany(MAX_RESULT_ROWS + 1)
+        columns = [d[0] for d in cursor.description] if cursor.description else []
+        cursor.close()
+        logger.debug("Query: %s", query)
+        if not rows:
             return "Query executed successfully. No results found."
-        if len(df) > 10:
-            return f"First 10 of {len(df)} results:\n" + df.head(10).to_markdown()
-        return df.to_markdown()
+        if len(rows) > MAX_RESULT_ROWS:
+            total = _count_rows(conn, query) if include_total else None
+            label = f"of {total} " if total is not None else ""
+            return f"First {MAX_RESULT_ROWS} {label}results:\n" + _to_csv(columns, rows[:MAX_RESULT_ROWS])
+        return _to_csv(columns, rows)
     except Exception as e:
         return f"Error executing query: {str(e)} {query}"
 
+_SCHEMA_CACHE = {"entry": (None, None)}
+
+def _build_schema(conn: sqlite3.Connection) -> str:
+    cursor = conn.execute(
+        "SELECT m.name, p.name, p.type, p.pk "
+        "FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+        "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%' "
+        "ORDER BY m.name, p.cid"
+    )
+    
+    lines = ["Current Database Schema:"]
+    for table, columns in groupby(cursor, key=itemgetter(0)):
+        lines.append(f"\nTable: {table}")
+        lines.extend(f"  - {column} ({col_type}){' (Primary Key)' if pk else ''}" for _, column, col_type, pk in columns)
+    
+    cursor.close()
+    return "\n".join(lines) + "\n"
+
 @tool
 def get_db_schema() -> str:
     """
@@ -32,23 +76,14 @@ def get_db_schema() -> str:
     Use this before writing SQL queries to ensure you use the correct column names.
     """
     try:
-        config = DatabaseConfig()
-        conn = get_db_connection(config)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = [t[0] for t in cursor.fetchall() if t[0] != 'sqlite_sequence']
-        
-        schema_output = "Current Database Schema:\n"
-        for table in tables:
-            schema_output += f"\nTable: {table}\n"
-            cursor.execute(f"PRAGMA table_info({table});")
-            columns = cursor.fetchall()
-            for col in columns:
-                pk = " (Primary Key)" if col[5] else ""
-                schema_output += f"  - {col[1]} ({col[2]}){pk}\n"
-        
-        conn.close()
-        return schema_output
+        config = DatabaseConfig(read_only=True)
+        conn = get_pooled_connection(config)
+        key = (str(config.db_path), conn.execute("PRAGMA schema_version").fetchone()[0])
+        cached_key, cached_text = _SCHEMA_CACHE["entry"]
+        if cached_key == key:
+            return cached_text
+        schema_text = _build_schema(conn)
+        _SCHEMA_CACHE["entry"] = (key, schema_text)
+        return schema_text
     except Exception as e:
         return f"Error retrieving schema: {str(e)}"
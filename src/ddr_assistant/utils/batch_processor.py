@@ -1,20 +1,31 @@
+import logging
+import os
 import sys
 import multiprocessing
 from pathlib import Path
+from typing import Optional, Tuple
 
 
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent
 
-def process_single_file(pdf_path: Path):
+logger = logging.getLogger(__name__)
+
+_PROCESSOR = None
+
+def _init_worker():
+    global _PROCESSOR
+    from ddr_assistant.utils.report_processor import ReportProcessor
+
+    _PROCESSOR = ReportProcessor()
+
+def process_single_file(pdf_path: Path) -> Tuple[Path, str, Optional[str]]:
     try:
-        from ddr_assistant.utils.report_processor import ReportProcessor
-        
-        processor = ReportProcessor()
-        
-        processor.process_pdf_to_database(pdf_path, verbose=False)
-        return True, None
+        if _PROCESSOR is None:
+            _init_worker()
+        _PROCESSOR.process_pdf_to_database(pdf_path, verbose=False)
+        return pdf_path, "processed", None
     except Exception as e:
-        return False, str(e)
+        return pdf_path, "failed", str(e)
 
 class BatchProcessor:
     def __init__(self, data_dir: Path, db_manager):
@@ -23,65 +34,92 @@ class BatchProcessor:
 
     def initialize_data(self, progress_callback=None, timeout_seconds=60):
         if not self.data_dir.exists():
-            print(f"Error: Data directory {self.data_dir} not found.")
+            logger.error("Data directory %s not found.", self.data_dir)
             return "error", f"Data directory {self.data_dir} not found."
 
         pdf_files = sorted(list(self.data_dir.glob("*.pdf")))
         if not pdf_files:
-            print("Warning: No PDF files found.")
+            logger.warning("No PDF files found.")
             return "warning", "No PDF files found in data directory."
 
         existing_reports_filenames = set()
         try:
-            existing_reports = self.db_manager.get_all_reports()
-            print(f"Found {len(existing_reports)} existing reports.")
-            if len(existing_reports) == len(pdf_files):
+            existing_reports_filenames = self.db_manager.get_existing_filenames(p.name for p in pdf_files)
+            logger.info("Found %d existing reports.", len(existing_reports_filenames))
+            if len(existing_reports_filenames) == len(pdf_files):
                 return "success", "All pdfs are already added..."
-            if hasattr(existing_reports, 'empty') and not existing_reports.empty:
-                existing_reports_filenames = set(existing_reports['file_name'].values)
-            elif isinstance(existing_reports, list):
-                existing_reports_filenames = set(r.file_name for r in existing_reports if hasattr(r, 'file_name'))
         except Exception as e:
-            print(f"Note: Could not check existing reports: {e}")
+            logger.warning("Could not check existing reports: %s", e)
 
-        processed_count = 0
-        skipped_count = 0
+        counts = {"processed": 0, "skipped": 0, "completed": 0}
         total_files = len(pdf_files)
         
-        print(f"Found {total_files} PDF files. Starting robust processing...")
+        logger.info("Found %d PDF files. Starting robust processing...", total_files)
         
-        for i, pdf_path in enumerate(pdf_files):
-            if progress_callback:
-                progress_callback(i, total_files, pdf_path.name)
-            
+        pending_files = []
+        for pdf_path in pdf_files:
             if pdf_path.name in existing_reports_filenames:
-                print(f"  ~ Skipping {pdf_path.name}: Already in database.")
-                skipped_count += 1
-                continue
+                logger.debug("Skipping %s: Already in database.", pdf_path.name)
+                counts["skipped"] += 1
+                counts["completed"] += 1
+            else:
+                pending_files.append(pdf_path)
+
+        def record(pdf_path, status, error):
+            counts["completed"] += 1
+            completed = counts["completed"]
+            if progress_callback:
+                progress_callback(completed - 1, total_files, pdf_path.name)
+            if completed % 10 == 0 or completed <= 5:
+                logger.info("[%d/%d] Finished %s", completed, total_files, pdf_path.name)
+
+            if status == "processed":
+                counts["processed"] += 1
+            elif status == "timeout":
+                logger.warning("Timeout %s: Skipped after %ss", pdf_path.name, timeout_seconds)
+                counts["skipped"] += 1
+            else:
+                logger.error("Failed %s: %s", pdf_path.name, error)
+
+        # Spawn, not fork: the app process holds open SQLite connections and the agent loop thread.
+        mp_context = multiprocessing.get_context("spawn")
+        remaining = pending_files
+        while remaining:
+            workers = max(1, min(len(remaining), (os.cpu_count() or 2) - 1))
+            batch, remaining = remaining, []
+            try:
+                with mp_context.Pool(processes=workers, initializer=_init_worker, maxtasksperchild=20) as pool:
+                    tasks = [(pdf_path, pool.apply_async(process_single_file, (pdf_path,))) for pdf_path in batch]
+                    for idx, (pdf_path, task) in enumerate(tasks):
+                        # The timeout counts from when this wait starts, not from when the task
+                        # started, so it caps how long one file can stall the batch, not its runtime.
+                        try:
+                            record(*task.get(timeout=timeout_seconds))
+                        except multiprocessing.TimeoutError:
+                            record(pdf_path, "timeout", None)
+                            # A hung or dead worker cannot be reclaimed; rerun the rest on a fresh pool.
+                            for later_path, later_task in tasks[idx + 1:]:
+                                if later_task.ready():
+                                    record(*later_task.get())
+                                else:
+                                    remaining.append(later_path)
+                            break
+            except Exception as e:
+                logger.exception("Fatal error during multiprocessing: %s", e)
+                remaining = []
 
+        processed_count = counts["processed"]
+        skipped_count = counts["skipped"]
+        if processed_count:
             try:
-                if i % 10 == 0 or i < 5:
-                    print(f"[{i+1}/{total_files}] Processing {pdf_path.name}...")
-                
-                with multiprocessing.Pool(processes=1) as pool:
-                    result = pool.apply_async(process_single_file, (pdf_path,))
-                    try:
-                        success, error = result.get(timeout=timeout_seconds)
-                        if success:
-                            processed_count += 1
-                        else:
-                            print(f"  ✗ Failed {pdf_path.name}: {error}")
-                    except multiprocessing.TimeoutError:
-                        print(f"  ⚠ Timeout {pdf_path.name}: Skipped after {timeout_seconds}s")
-                        skipped_count += 1
-                    except Exception as e:
-                        print(f"  ✗ Error getting result for {pdf_path.name}: {e}")
+                self.db_manager.optimize()
             except Exception as e:
-                print(f"  ✗ Fatal error during multiprocessing for {pdf_path.name}: {e}")
+                logger.warning("Could not optimize database: %s", e)
 
         return "success", f"✅ Batch complete! Processed: {processed_count}, Skipped: {skipped_count}"
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     src_path = str(ROOT_DIR / "src")
     if src_path not in sys.path:
         sys.path.insert(0, src_path)
@@ -1,8 +1,9 @@
 import sqlite3
+from dataclasses import fields
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Set
 import pandas as pd
-from ddr_assistant.config import DatabaseConfig, get_db_connection
+from ddr_assistant.config import ConnectionPool, DatabaseConfig
 from ddr_assistant.utils.models import (
     DrillingFluidRecord,
     GasReadingRecord,
@@ -10,6 +11,16 @@ from ddr_assistant.utils.models import (
     ReportMetadata,
 )
 
+def _insert_statement(table: str, model) -> str:
+    columns = [f.name for f in fields(model)]
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+INSERT_REPORT_METADATA = _insert_statement("report_metadata", ReportMetadata)
+INSERT_OPERATIONS = _insert_statement("operations", OperationRecord)
+INSERT_DRILLING_FLUID = _insert_statement("drilling_fluid", DrillingFluidRecord)
+INSERT_GAS_READINGS = _insert_statement("gas_readings", GasReadingRecord)
+SQLITE_MAX_PARAMS = 900
+
 class DatabaseManager:
     SCHEMA = """
     CREATE TABLE IF NOT EXISTS report_metadata (
@@ -96,123 +107,129 @@ class DatabaseManager:
     
     def __init__(self, config: Optional[DatabaseConfig] = None):
         self.config = config or DatabaseConfig()
+        self._pool = ConnectionPool(self.config)
         self._init_database()
     
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+    
+    def optimize(self):
+        self._pool.optimize()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
     def _init_database(self):
-        conn = get_db_connection(self.config)
-        cursor = conn.cursor()
-        cursor.executescript(self.SCHEMA)
-        
-        cursor.execute("PRAGMA table_info(report_metadata)")
-        existing_cols = [col[1] for col in cursor.fetchall()]
-        
-        new_cols = [
-            ('wellbore_name', 'TEXT'),
-            ('report_period', 'TEXT'),
-            ('summary_activities', 'TEXT'),
-            ('planned_activities', 'TEXT'),
-            ('file_name', 'TEXT')
-        ]
-        
-        for col_name, col_type in new_cols:
-            if col_name not in existing_cols:
-                try:
-                    cursor.execute(f"ALTER TABLE report_metadata ADD COLUMN {col_name} {col_type}")
-                except Exception as e:
-                    print(f"Migration error for {col_name}: {e}")
-                    
-        conn.commit()
-        cursor.close()
-        conn.close()
+        with self._pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.executescript(self.SCHEMA)
+            
+            cursor.execute("PRAGMA table_info(report_metadata)")
+            existing_cols = [col[1] for col in cursor.fetchall()]
+            
+            new_cols = [
+                ('wellbore_name', 'TEXT'),
+                ('report_period', 'TEXT'),
+                ('summary_activities', 'TEXT'),
+                ('planned_activities', 'TEXT'),
+                ('file_name', 'TEXT')
+            ]
+            
+            for col_name, col_type in new_cols:
+                if col_name not in existing_cols:
+                    try:
+                        cursor.execute(f"ALTER TABLE report_metadata ADD COLUMN {col_name} {col_type}")
+                    except Exception as e:
+                        print(f"Migration error for {col_name}: {e}")
+            
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_report_metadata_file_name ON report_metadata(file_name)")
+            cursor.close()
+    
+    def transaction(self):
+        return self._pool.writer()
     
     def save_report_metadata(self, metadata: ReportMetadata) -> str:
-        df = pd.DataFrame([metadata.to_dict()])
-        conn = get_db_connection(self.config)
-        df.to_sql('report_metadata', conn, if_exists='append', index=False)
-        conn.close()
+        with self._pool.writer() as conn:
+            conn.execute(INSERT_REPORT_METADATA, metadata.to_row())
         return metadata.report_id
     
     def save_operations(self, operations: List[OperationRecord]) -> int:
         if not operations:
             return 0
-        df = pd.DataFrame([op.to_dict() for op in operations])
-        conn = get_db_connection(self.config)
-        df.to_sql('operations', conn, if_exists='append', index=False)
-        conn.close()
+        rows = [op.to_row() for op in operations]
+        with self._pool.writer() as conn:
+            conn.executemany(INSERT_OPERATIONS, rows)
         return len(operations)
     
     def save_drilling_fluid(self, fluid_records: List[DrillingFluidRecord]) -> int:
         if not fluid_records:
             return 0
-        df = pd.DataFrame([rec.to_dict() for rec in fluid_records])
-        conn = get_db_connection(self.config)
-        df.to_sql('drilling_fluid', conn, if_exists='append', index=False)
-        conn.close()
+        rows = [rec.to_row() for rec in fluid_records]
+        with self._pool.writer() as conn:
+            conn.executemany(INSERT_DRILLING_FLUID, rows)
         return len(fluid_records)
     
     def save_gas_readings(self, gas_readings: List[GasReadingRecord]) -> int:
         if not gas_readings:
             return 0
-        df = pd.DataFrame([rec.to_dict() for rec in gas_readings])
-        conn = get_db_connection(self.config)
-        df.to_sql('gas_readings', conn, if_exists='append', index=False)
-        conn.close()
+        rows = [rec.to_row() for rec in gas_readings]
+        with self._pool.writer() as conn:
+            conn.executemany(INSERT_GAS_READINGS, rows)
         return len(gas_readings)
     
     def save_dataframe(self, df: pd.DataFrame, table_name: str, if_exists: str = 'append') -> int:
-        conn = get_db_connection(self.config)
-        df.to_sql(table_name, conn, if_exists=if_exists, index=False)
-        conn.close()
+        with self._pool.writer() as conn:
+            df.to_sql(table_name, conn, if_exists=if_exists, index=False)
         return len(df)
     
     def get_report_by_id(self, report_id: str) -> Optional[Dict]:
-        conn = get_db_connection(self.config)
-        df = pd.read_sql_query("SELECT * FROM report_metadata WHERE report_id = ?", conn, params=(report_id,))
-        conn.close()
-        if len(df) == 0:
-            return None
-        return df.iloc[0].to_dict()
+        with self._pool.reader() as conn:
+            row = conn.execute("SELECT * FROM report_metadata WHERE report_id = ?", (report_id,)).fetchone()
+        return dict(row) if row is not None else None
     
     def get_operations_by_report(self, report_id: str) -> pd.DataFrame:
-        conn = get_db_connection(self.config)
-        df = pd.read_sql_query("SELECT * FROM operations WHERE report_id = ? ORDER BY start_time", conn, params=(report_id,))
-        conn.close()
-        return df
+        with self._pool.reader() as conn:
+            return pd.read_sql_query("SELECT * FROM operations WHERE report_id = ? ORDER BY start_time", conn, params=(report_id,))
     
     def get_drilling_fluid_by_report(self, report_id: str) -> pd.DataFrame:
-        conn = get_db_connection(self.config)
-        df = pd.read_sql_query("SELECT * FROM drilling_fluid WHERE report_id = ?", conn, params=(report_id,))
-        conn.close()
-        return df
+        with self._pool.reader() as conn:
+            return pd.read_sql_query("SELECT * FROM drilling_fluid WHERE report_id = ?", conn, params=(report_id,))
     
     def get_gas_readings_by_report(self, report_id: str) -> pd.DataFrame:
-        conn = get_db_connection(self.config)
-        df = pd.read_sql_query("SELECT * FROM gas_readings WHERE report_id = ? ORDER BY depth_m", conn, params=(report_id,))
-        conn.close()
-        return df
+        with self._pool.reader() as conn:
+            return pd.read_sql_query("SELECT * FROM gas_readings WHERE report_id = ? ORDER BY depth_m", conn, params=(report_id,))
     
     def get_all_reports(self) -> pd.DataFrame:
-        conn = get_db_connection(self.config)
-        df = pd.read_sql_query("SELECT * FROM report_metadata ORDER BY report_creation_time DESC", conn)
-        conn.close()
-        return df
+        with self._pool.reader() as conn:
+            return pd.read_sql_query("SELECT * FROM report_metadata ORDER BY report_creation_time DESC", conn)
+    
+    def get_existing_filenames(self, candidates: Iterable[str]) -> Set[str]:
+        candidates = list(candidates)
+        existing = set()
+        with self._pool.reader() as conn:
+            for start in range(0, len(candidates), SQLITE_MAX_PARAMS):
+                chunk = candidates[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(f"SELECT file_name FROM report_metadata WHERE file_name IN ({placeholders})", chunk)
+                existing.update(row[0] for row in cursor.fetchall())
+        return existing
     
     def delete_report(self, report_id: str) -> bool:
-        conn = get_db_connection(self.config)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM report_metadata WHERE report_id = ?", (report_id,))
-        if cursor.fetchone()[0] == 0:
+        with self._pool.writer() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM report_metadata WHERE report_id = ?", (report_id,))
+            if cursor.fetchone()[0] == 0:
+                cursor.close()
+                return False
+            cursor.execute("DELETE FROM report_metadata WHERE report_id = ?", (report_id,))
             cursor.close()
-            conn.close()
-            return False
-        cursor.execute("DELETE FROM report_metadata WHERE report_id = ?", (report_id,))
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return True
+            return True
     
     def query(self, sql: str, params: Optional[tuple] = None) -> pd.DataFrame:
-        conn = get_db_connection(self.config)
-        df = pd.read_sql_query(sql, conn, params=params)
-        conn.close()
-        return df
+        with self._pool.reader() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
@@ -15,17 +15,25 @@ class GuardrailManager:
             r"bypass",
             r"jailbreak"
         ]
+        self._injection_re = re.compile(
+            "|".join(f"(?:{pattern})" for pattern in self.injection_patterns),
+            re.IGNORECASE,
+        )
         
         self.pii_patterns = {
             "email": r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+",
             "phone": r"\+?\d{1,3}[-.\s]?\(?\d{1,3}\)?[-.\s]?\d{3,4}[-.\s]?\d{4}"
         }
+        self._pii_res = {
+            pii_type: (re.compile(pattern), f"[{pii_type.upper()}_REDACTED]")
+            for pii_type, pattern in self.pii_patterns.items()
+        }
 
     def validate_input(self, text: str) -> Tuple[bool, str]:
-        for pattern in self.injection_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                logger.warning(f"Potential prompt injection detected: {pattern}")
-                return False, "I cannot process this request as it violates safety guidelines."
+        match = self._injection_re.search(text)
+        if match:
+            logger.warning(f"Potential prompt injection detected: {match.group(0)}")
+            return False, "I cannot process this request as it violates safety guidelines."
 
         if len(text) > 4000:
             return False, "Input is too long. Please shorten your request."
@@ -33,13 +41,13 @@ class GuardrailManager:
         return True, text
 
     def validate_output(self, text: str) -> Tuple[bool, str]:
-        for pii_type, pattern in self.pii_patterns.items():
-            if re.search(pattern, text):
+        for pii_type, (pattern, _) in self._pii_res.items():
+            if pattern.search(text):
                 logger.warning(f"Potential {pii_type} detected in output.")
 
         return True, text
 
     def mask_pii(self, text: str) -> str:
-        for pii_type, pattern in self.pii_patterns.items():
-            text = re.sub(pattern, f"[{pii_type.upper()}_REDACTED]", text)
+        for pattern, replacement in self._pii_res.values():
+            text = pattern.sub(replacement, text)
         return text
@@ -3,9 +3,9 @@ from datetime import datetime
 from typing import Optional
 import uuid
 
-@dataclass
+@dataclass(slots=True)
 class ReportMetadata:
-    report_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    report_id: str = field(default_factory=lambda: uuid.uuid4().hex)
     status: Optional[str] = None
     report_creation_time: Optional[str] = None
     report_number: Optional[str] = None
@@ -69,8 +69,42 @@ class ReportMetadata:
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
         }
+    
+    def to_row(self) -> tuple:
+        return (
+            self.report_id,
+            self.status,
+            self.report_creation_time,
+            self.report_number,
+            self.days_ahead_behind,
+            self.operator,
+            self.rig_name,
+            self.drilling_contractor,
+            self.spud_date,
+            self.wellbore_type,
+            self.wellbore_name,
+            self.date_well_complete,
+            self.report_period,
+            self.summary_activities,
+            self.planned_activities,
+            self.file_name,
+            self.elevation_rkb_msl_m,
+            self.water_depth_msl_m,
+            self.dist_drilled_m,
+            self.penetration_rate_m_h,
+            self.hole_dia_in,
+            self.pressure_test_type,
+            self.formation_strength_g_cm3,
+            self.dia_last_casing,
+            self.tight_well,
+            self.hpht,
+            self.temperature,
+            self.pressure,
+            self.created_at.isoformat(),
+            self.updated_at.isoformat(),
+        )
 
-@dataclass
+@dataclass(slots=True)
 class OperationRecord:
     report_id: str
     start_time: Optional[str] = None
@@ -79,7 +113,7 @@ class OperationRecord:
     main_sub_activity: Optional[str] = None
     state: Optional[str] = None
     remark: Optional[str] = None
-    operation_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    operation_id: str = field(default_factory=lambda: uuid.uuid4().hex)
     created_at: datetime = field(default_factory=datetime.now)
     
     def to_dict(self) -> dict:
@@ -94,14 +128,27 @@ class OperationRecord:
             'remark': self.remark,
             'created_at': self.created_at.isoformat(),
         }
+    
+    def to_row(self) -> tuple:
+        return (
+            self.report_id,
+            self.start_time,
+            self.end_time,
+            self.end_depth_mmd,
+            self.main_sub_activity,
+            self.state,
+            self.remark,
+            self.operation_id,
+            self.created_at.isoformat(),
+        )
 
-@dataclass
+@dataclass(slots=True)
 class DrillingFluidRecord:
     report_id: str
     parameter_name: Optional[str] = None
     value: Optional[str] = None
     unit: Optional[str] = None
-    fluid_record_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    fluid_record_id: str = field(default_factory=lambda: uuid.uuid4().hex)
     created_at: datetime = field(default_factory=datetime.now)
     
     def to_dict(self) -> dict:
@@ -113,8 +160,18 @@ class DrillingFluidRecord:
             'unit': self.unit,
             'created_at': self.created_at.isoformat(),
         }
+    
+    def to_row(self) -> tuple:
+        return (
+            self.report_id,
+            self.parameter_name,
+            self.value,
+            self.unit,
+            self.fluid_record_id,
+            self.created_at.isoformat(),
+        )
 
-@dataclass
+@dataclass(slots=True)
 class GasReadingRecord:
     report_id: str
     depth_m: Optional[float] = None
@@ -129,7 +186,7 @@ class GasReadingRecord:
     trip_gas: Optional[float] = None
     background_gas: Optional[float] = None
     connection_gas: Optional[float] = None
-    gas_reading_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    gas_reading_id: str = field(default_factory=lambda: uuid.uuid4().hex)
     created_at: datetime = field(default_factory=datetime.now)
     
     def to_dict(self) -> dict:
@@ -150,3 +207,22 @@ class GasReadingRecord:
             'connection_gas': self.connection_gas,
             'created_at': self.created_at.isoformat(),
         }
+    
+    def to_row(self) -> tuple:
+        return (
+            self.report_id,
+            self.depth_m,
+            self.c1,
+            self.c2,
+            self.c3,
+            self.ic4,
+            self.nc4,
+            self.ic5,
+            self.nc5,
+            self.total_gas,
+            self.trip_gas,
+            self.background_gas,
+            self.connection_gas,
+            self.gas_reading_id,
+            self.created_at.isoformat(),
+        )
@@ -1,4 +1,12 @@
+import hashlib
+import json
+import os
 import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import pairwise, repeat
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
 import camelot
@@ -7,82 +15,232 @@ import numpy as np
 import pandas as pd
 import pdfplumber
 
+SECTION_CACHE_DIR = Path.home() / ".cache" / "ddr_assistant" / "sections"
+# Bump whenever section detection changes so stale cache entries are ignored.
+SECTION_CACHE_VERSION = 2
+LOWER_GRAY_HSV = np.array([0, 0, 100], dtype=np.uint8)
+UPPER_GRAY_HSV = np.array([180, 50, 220], dtype=np.uint8)
+SECTION_RESOLUTION = 72
+
+_MULTI_UNDERSCORE_RE = re.compile(r'_+')
+_PAREN_CONTENT_RE = re.compile(r'\([^)]*\)')
+_NON_WORD_RE = re.compile(r'[^\w\s-]')
+_HYPHEN_SPACE_RE = re.compile(r'[-\s]+')
+_KEY_TRANSLATION = str.maketrans({' ': '_', '(': None, ')': None, '/': '_', '+': 'plus', '-': '_', ':': '_'})
+_COLUMN_TRANSLATION = str.maketrans({'\n': '_', ' ': '_', '/': '_', '-': '_', '(': None, ')': None})
+
+def parse_key_value_table(df: pd.DataFrame) -> Dict[str, any]:
+    if df.shape[1] < 2 or df.empty:
+        return {}
+    keys = df.iloc[:, 0]
+    cells = df.iloc[:, 1:].to_numpy(dtype=object)
+    present = pd.notna(cells)
+    values = cells[np.arange(len(cells)), present.argmax(axis=1)]
+    values[~present.any(axis=1)] = None
+    
+    has_key = keys.notna().to_numpy()
+    key_strs = keys[has_key].astype(str).str.rstrip(':').str.strip()
+    values = values[has_key]
+    non_empty = (key_strs != '').to_numpy()
+    normalized = key_strs[non_empty].str.lower().str.translate(_KEY_TRANSLATION)
+    normalized = normalized.str.replace(_MULTI_UNDERSCORE_RE, '_', regex=True).str.strip('_')
+    return dict(zip(map(sys.intern, normalized), values[non_empty]))
+
+def normalize_tabular_table(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        return df
+    frame = df
+    is_generic_index = all(isinstance(c, int) for c in frame.columns) or all(str(c).isdigit() for c in frame.columns)
+    if is_generic_index and len(frame) > 0:
+        first_row = frame.iloc[0].astype(str).tolist()
+        text_cells = [c for c in first_row if any(char.isalpha() for char in c)]
+        if len(text_cells) >= 2:
+            frame = frame.iloc[1:].reset_index(drop=True)
+            frame.columns = first_row
+    
+    normalized_columns = []
+    for col in frame.columns:
+        col_str = str(col).lower()
+        if 'unnamed' in col_str:
+            normalized_columns.append(sys.intern(col_str))
+        else:
+            norm_col = col_str.translate(_COLUMN_TRANSLATION).strip('_')
+            norm_col = _MULTI_UNDERSCORE_RE.sub('_', norm_col)
+            normalized_columns.append(sys.intern(norm_col))
+    frame = frame.set_axis(normalized_columns, axis=1)
+    return frame.loc[:, ~frame.columns.duplicated(keep='last')]
+
+def parse_tabular_table(df: pd.DataFrame) -> List[Dict]:
+    frame = normalize_tabular_table(df)
+    if frame.empty:
+        return []
+    return frame.replace({np.nan: None}).to_dict(orient='records')
+
+def is_key_value_table(df: pd.DataFrame) -> bool:
+    if len(df.columns) > 4:
+        return False
+    if any('unnamed' in str(col).lower() for col in df.columns):
+        return True
+    first_col = df.iloc[:, 0].dropna()
+    if len(first_col) > 0:
+        colon_count = sum(1 for x in first_col if isinstance(x, str) and x.strip().endswith(':'))
+        if colon_count / len(first_col) > 0.3:
+            return True
+    return False
+
+def _has_duplicate_chars(text: str) -> bool:
+    duplicate_count = sum(1 for a, b in pairwise(text) if a == b and a.isalpha())
+    return duplicate_count > len(text) * 0.2
+
+def _count_special_chars(text: str) -> int:
+    return sum(1 for c in text if not (c.isalpha() or c.isspace()))
+
+def _normalize_section_name(text: str) -> str:
+    name = _PAREN_CONTENT_RE.sub('', text)
+    name = name.lower().strip()
+    name = _NON_WORD_RE.sub('', name)
+    name = _HYPHEN_SPACE_RE.sub('_', name)
+    return name
+
+def _boxes_with_chars(chars: List[Dict], boxes: np.ndarray) -> np.ndarray:
+    if not chars:
+        return np.zeros(len(boxes), dtype=bool)
+    char_boxes = np.array([(c['x0'], c['top'], c['x1'], c['bottom']) for c in chars], dtype=np.float64)
+    overlaps = (
+        (char_boxes[None, :, 0] < boxes[:, None, 2])
+        & (char_boxes[None, :, 2] > boxes[:, None, 0])
+        & (char_boxes[None, :, 1] < boxes[:, None, 3])
+        & (char_boxes[None, :, 3] > boxes[:, None, 1])
+    )
+    return overlaps.any(axis=1)
+
+def _page_sections(page, page_num: int, resolution: int = SECTION_RESOLUTION) -> List[Dict]:
+    sections = []
+    ratio = resolution / 150
+    min_width, min_height, max_height = 200 * ratio, 15 * ratio, 40 * ratio
+    img = page.to_image(resolution=resolution)
+    pil_img = img.original
+    hsv = cv2.cvtColor(np.asarray(pil_img), cv2.COLOR_RGB2HSV)
+    mask = cv2.inRange(hsv, LOWER_GRAY_HSV, UPPER_GRAY_HSV)
+    # Some headers are drawn as outlines only, so a component spanning min_width is the only safe bound.
+    if cv2.countNonZero(mask) < min_width:
+        return sections
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    rects = stats[1:][(widths > min_width) & (heights > min_height) & (heights < max_height), :4]
+    if not len(rects):
+        return sections
+    
+    scale = page.width / hsv.shape[1]
+    rects = rects.astype(np.float64) * scale
+    boxes = np.column_stack([rects[:, 0], rects[:, 1], rects[:, 0] + rects[:, 2], rects[:, 1] + rects[:, 3]])
+    boxes = boxes[np.argsort(boxes[:, 1], kind='stable')]
+    boxes = boxes[_boxes_with_chars(page.chars, boxes)]
+    for pdf_x0, pdf_y0, pdf_x1, pdf_y1 in boxes.tolist():
+        try:
+            cropped = page.crop((pdf_x0, pdf_y0, pdf_x1, pdf_y1))
+            text = cropped.extract_text()
+            if text and len(text.strip()) > 3:
+                text = text.strip()
+                if (len(text) > 100 or _has_duplicate_chars(text) or _count_special_chars(text) > len(text) * 0.3):
+                    continue
+                sections.append({
+                    'page': page_num,
+                    'text': text,
+                    'y_position': pdf_y0,
+                    'page_height': page.height,
+                })
+        except Exception:
+            continue
+    return sections
+
+def _detect_page_sections(pdf_path: Path, page_num: int, resolution: int = SECTION_RESOLUTION) -> List[Dict]:
+    with pdfplumber.open(pdf_path) as pdf:
+        return _page_sections(pdf.pages[page_num - 1], page_num, resolution)
+
 class PDFProcessor:
     def __init__(self, pdf_path: Union[str, Path]):
         self.pdf_path = Path(pdf_path)
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        self._pdf = None
+        self._digest = None
     
-    def extract_sections(self) -> List[Dict]:
-        sections = []
-        with pdfplumber.open(self.pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, 1):
-                img = page.to_image(resolution=150)
-                pil_img = img.original
-                opencv_img = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR)
-                hsv = cv2.cvtColor(opencv_img, cv2.COLOR_BGR2HSV)
-                lower_gray = np.array([0, 0, 100])
-                upper_gray = np.array([180, 50, 220])
-                mask = cv2.inRange(hsv, lower_gray, upper_gray)
-                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                
-                for contour in contours:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    if w > 200 and 15 < h < 40:
-                        scale = page.width / opencv_img.shape[1]
-                        pdf_x0 = x * scale
-                        pdf_y0 = y * scale
-                        pdf_x1 = (x + w) * scale
-                        pdf_y1 = (y + h) * scale
-                        
-                        try:
-                            cropped = page.crop((pdf_x0, pdf_y0, pdf_x1, pdf_y1))
-                            text = cropped.extract_text()
-                            if text and len(text.strip()) > 3:
-                                text = text.strip()
-                                if (self._has_duplicate_chars(text) or len(text) > 100 or self._count_special_chars(text) > len(text) * 0.3):
-                                    continue
-                                sections.append({
-                                    'page': page_num,
-                                    'text': text,
-                                    'y_position': pdf_y0,
-                                    'page_height': page.height,
-                                })
-                        except Exception:
-                            continue
+    @property
+    def digest(self) -> str:
+        if self._digest is None:
+            self._digest = hashlib.md5(self.pdf_path.read_bytes(), usedforsecurity=False).hexdigest()
+        return self._digest
+    
+    @property
+    def pdf(self) -> pdfplumber.PDF:
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.pdf_path)
+        return self._pdf
+    
+    def close(self):
+        pdf = getattr(self, '_pdf', None)
+        if pdf is not None:
+            pdf.close()
+            self._pdf = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def extract_sections(self, force_refresh: bool = False, n_workers: int = 1, resolution: int = SECTION_RESOLUTION) -> List[Dict]:
+        cache_path = SECTION_CACHE_DIR / f"{self.digest}_{resolution}_v{SECTION_CACHE_VERSION}.json"
+        if not force_refresh and cache_path.exists():
+            try:
+                return json.loads(cache_path.read_text())
+            except (OSError, ValueError):
+                pass
+        
+        sections = self._detect_sections(n_workers, resolution)
+        if not sections:
+            return sections
+        try:
+            SECTION_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(sections))
+            os.replace(tmp_path, cache_path)
+        except (OSError, TypeError):
+            pass
+        return sections
+    
+    def _detect_sections(self, n_workers: int = 1, resolution: int = SECTION_RESOLUTION) -> List[Dict]:
+        page_count = len(self.pdf.pages)
+        if n_workers > 1 and page_count > 1:
+            with ProcessPoolExecutor(max_workers=min(n_workers, page_count)) as executor:
+                per_page = executor.map(_detect_page_sections, repeat(self.pdf_path), range(1, page_count + 1), repeat(resolution))
+                sections = [section for page_sections in per_page for section in page_sections]
+        else:
+            sections = []
+            for page_num, page in enumerate(self.pdf.pages, 1):
+                sections.extend(_page_sections(page, page_num, resolution))
         
-        seen = set()
-        unique_sections = []
-        for s in sections:
-            if s['text'] not in seen:
-                seen.add(s['text'])
-                unique_sections.append(s)
+        first_by_text = {}
+        for section in sections:
+            first_by_text.setdefault(section['text'], section)
         
-        unique_sections.sort(key=lambda x: (x['page'], x['y_position']))
-        return unique_sections
+        return sorted(first_by_text.values(), key=itemgetter('page', 'y_position'))
     
     def extract_tables_by_sections(self, sections: Optional[List[Dict]] = None) -> Dict[str, pd.DataFrame]:
         if sections is None:
             sections = self.extract_sections()
         
         tables_dict = {}
-        with pdfplumber.open(self.pdf_path) as pdf:
-            page_width = pdf.pages[0].width
-            page_height = pdf.pages[0].height
+        first_page = self.pdf.pages[0]
+        page_width = first_page.width
+        page_height = first_page.height
         
+        regions_by_page = defaultdict(list)
         if sections and sections[0]['page'] == 1:
             first_section = sections[0]
-            y1 = page_height
-            y2 = page_height - first_section['y_position'] + 10
-            region = f'0,{y1},{page_width},{y2}'
-            
-            try:
-                tables = camelot.read_pdf(str(self.pdf_path), pages='1', flavor='lattice', table_regions=[region])
-                for idx, table in enumerate(tables):
-                    key = f'common_{idx + 1}'
-                    tables_dict[key] = table.df
-            except Exception:
-                pass
+            regions_by_page[1].append((None, page_height, page_height - first_section['y_position'] + 10))
         
         for i, section in enumerate(sections):
             page_num = section['page']
@@ -96,54 +254,84 @@ class PDFProcessor:
             
             y1 = page_height - section_y_top - 20
             y2 = page_height - next_y + 10
-            region = f'0,{y1},{page_width},{y2}'
-            
+            # Headers closer than 30pt leave no body; camelot would flip the region into the next section.
+            if y1 > y2:
+                regions_by_page[page_num].append((_normalize_section_name(section['text']), y1, y2))
+        
+        common_count = 0
+        for page_num, regions in regions_by_page.items():
             try:
-                tables = camelot.read_pdf(str(self.pdf_path), pages=str(page_num), flavor='lattice', table_regions=[region])
-                if len(tables) > 0:
-                    name = self._normalize_section_name(section['text'])
-                    tables_dict[name] = tables[0].df
+                tables = camelot.read_pdf(
+                    str(self.pdf_path),
+                    pages=str(page_num),
+                    flavor='lattice',
+                    table_regions=[f'0,{y1},{page_width},{y2}' for _, y1, y2 in regions],
+                )
             except Exception:
                 continue
+            
+            claimed = set()
+            for table in tables:
+                idx = self._region_for_table(table, regions)
+                if idx is None:
+                    continue
+                name = regions[idx][0]
+                if name is None:
+                    common_count += 1
+                    tables_dict[f'common_{common_count}'] = table.df
+                elif idx not in claimed:
+                    claimed.add(idx)
+                    tables_dict[name] = table.df
         return tables_dict
 
+    @staticmethod
+    def _region_for_table(table, regions: List[Tuple[Optional[str], float, float]]) -> Optional[int]:
+        _, y_a, _, y_b = table._bbox
+        table_bottom, table_top = min(y_a, y_b), max(y_a, y_b)
+        best_idx, best_overlap = None, 0
+        for idx, (_, top, bottom) in enumerate(regions):
+            overlap = min(top, table_top) - max(bottom, table_bottom)
+            if overlap > best_overlap:
+                best_idx, best_overlap = idx, overlap
+        return best_idx
+
     def extract_text_by_sections(self, sections: Optional[List[Dict]] = None) -> Dict[str, str]:
         if sections is None:
             sections = self.extract_sections()
             
         text_dict = {}
-        with pdfplumber.open(self.pdf_path) as pdf:
-            if sections and sections[0]['page'] == 1:
-                first_section = sections[0]
-                page = pdf.pages[0]
-                try:
-                    crop_box = (0, 0, page.width, first_section['y_position'])
-                    common_text = page.crop(crop_box).extract_text()
-                    if common_text:
-                        text_dict['common'] = common_text.strip()
-                except Exception:
-                    pass
-
-            for i, section in enumerate(sections):
-                page_num = section['page']
-                page = pdf.pages[page_num - 1]
-                page_height = section['page_height']
-                section_y_top = section['y_position']
-                
-                if i + 1 < len(sections) and sections[i + 1]['page'] == page_num:
-                    next_y = sections[i + 1]['y_position']
-                else:
-                    next_y = page_height
-                
-                try:
-                    crop_box = (0, section_y_top + 20, page.width, next_y - 5)
-                    cropped = page.crop(crop_box)
-                    text = cropped.extract_text()
-                    if text:
-                        name = self._normalize_section_name(section['text'])
-                        text_dict[name] = text.strip()
-                except Exception:
-                    continue
+        pdf = self.pdf
+        if sections and sections[0]['page'] == 1:
+            first_section = sections[0]
+            page = pdf.pages[0]
+            try:
+                crop_box = (0, 0, page.width, first_section['y_position'])
+                common_text = page.crop(crop_box).extract_text()
+                if common_text:
+                    text_dict['common'] = common_text.strip()
+            except Exception:
+                pass
+
+        for i, section in enumerate(sections):
+            page_num = section['page']
+            page = pdf.pages[page_num - 1]
+            page_height = section['page_height']
+            section_y_top = section['y_position']
+            
+            if i + 1 < len(sections) and sections[i + 1]['page'] == page_num:
+                next_y = sections[i + 1]['y_position']
+            else:
+                next_y = page_height
+            
+            try:
+                crop_box = (0, section_y_top + 20, page.width, next_y - 5)
+                cropped = page.crop(crop_box)
+                text = cropped.extract_text()
+                if text:
+                    name = _normalize_section_name(section['text'])
+                    text_dict[name] = text.strip()
+            except Exception:
+                continue
         return text_dict
 
     def extract_all_data(self) -> Tuple[Dict[str, pd.DataFrame], List[Dict], Dict[str, str]]:
@@ -152,78 +340,10 @@ class PDFProcessor:
         text_data = self.extract_text_by_sections(sections)
         return tables, sections, text_data
     
-    def parse_key_value_table(self, df: pd.DataFrame) -> Dict[str, any]:
-        result = {}
-        for _, row in df.iterrows():
-            if len(row) < 2:
-                continue
-            key = row.iloc[0]
-            value = None
-            for i in range(1, len(row)):
-                if pd.notna(row.iloc[i]):
-                    value = row.iloc[i]
-                    break
-            if pd.notna(key):
-                key_str = str(key).rstrip(':').strip()
-                if key_str:
-                    normalized_key = (key_str.lower().replace(' ', '_').replace('(', '').replace(')', '').replace('/', '_').replace('+', 'plus').replace('-', '_').replace(':', '_'))
-                    normalized_key = re.sub(r'_+', '_', normalized_key).strip('_')
-                    result[normalized_key] = value
-        return result
-    
-    def parse_tabular_table(self, df: pd.DataFrame) -> List[Dict]:
-        if df.empty:
-            return []
-        df_copy = df.copy()
-        is_generic_index = all(isinstance(c, int) for c in df_copy.columns) or all(str(c).isdigit() for c in df_copy.columns)
-        if is_generic_index and len(df_copy) > 0:
-            first_row = df_copy.iloc[0].astype(str).tolist()
-            text_cells = [c for c in first_row if any(char.isalpha() for char in c)]
-            if len(text_cells) >= 2:
-                df_copy.columns = first_row
-                df_copy = df_copy.iloc[1:].reset_index(drop=True)
-        
-        normalized_columns = []
-        for col in df_copy.columns:
-            col_str = str(col).lower()
-            if 'unnamed' in col_str:
-                normalized_columns.append(col_str)
-            else:
-                norm_col = (col_str.replace('\n', '_').replace(' ', '_').replace('/', '_').replace('-', '_').replace('(', '').replace(')', '').strip('_'))
-                norm_col = re.sub(r'_+', '_', norm_col)
-                normalized_columns.append(norm_col)
-        df_copy.columns = normalized_columns
-        df_copy = df_copy.replace({np.nan: None})
-        return df_copy.to_dict(orient='records')
-
-    def is_key_value_table(self, df: pd.DataFrame) -> bool:
-        if len(df.columns) > 4:
-            return False
-        if any('unnamed' in str(col).lower() for col in df.columns):
-            return True
-        first_col = df.iloc[:, 0].dropna()
-        if len(first_col) > 0:
-            colon_count = sum(1 for x in first_col if isinstance(x, str) and x.strip().endswith(':'))
-            if colon_count / len(first_col) > 0.3:
-                return True
-        return False
-    
-    @staticmethod
-    def _has_duplicate_chars(text: str) -> bool:
-        duplicate_count = 0
-        for i in range(len(text) - 1):
-            if text[i] == text[i + 1] and text[i].isalpha():
-                duplicate_count += 1
-        return duplicate_count > len(text) * 0.2
-    
-    @staticmethod
-    def _count_special_chars(text: str) -> int:
-        return sum(1 for c in text if not c.isalpha() and not c.isspace())
-    
-    @staticmethod
-    def _normalize_section_name(text: str) -> str:
-        name = re.sub(r'\([^)]*\)', '', text)
-        name = name.lower().strip()
-        name = re.sub(r'[^\w\s-]', '', name)
-        name = re.sub(r'[-\s]+', '_', name)
-        return name
+    parse_key_value_table = staticmethod(parse_key_value_table)
+    parse_tabular_table = staticmethod(parse_tabular_table)
+    normalize_tabular_table = staticmethod(normalize_tabular_table)
+    is_key_value_table = staticmethod(is_key_value_table)
+    _has_duplicate_chars = staticmethod(_has_duplicate_chars)
+    _count_special_chars = staticmethod(_count_special_chars)
+    _normalize_section_name = staticmethod(_normalize_section_name)
@@ -1,5 +1,7 @@
+from datetime import datetime
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Union
 import pandas as pd
 import re
 from ddr_assistant.config import DatabaseConfig
@@ -10,7 +12,56 @@ from ddr_assistant.utils.models import (
     OperationRecord,
     ReportMetadata,
 )
-from ddr_assistant.utils.pdf_processor import PDFProcessor
+from ddr_assistant.utils.pdf_processor import (
+    PDFProcessor,
+    is_key_value_table,
+    normalize_tabular_table,
+    parse_key_value_table,
+)
+
+_NUMBER_RE = re.compile(r'[-+]?\d*\.\d+|\d+')
+_NUMBER_GROUP_RE = re.compile(f'({_NUMBER_RE.pattern})')
+
+GAS_READING_FIELDS = (
+    'depth_m', 'c1', 'c2', 'c3', 'ic4', 'nc4', 'ic5', 'nc5',
+    'total_gas', 'trip_gas', 'background_gas', 'connection_gas',
+)
+
+OPERATION_FIELDS = ('start_time', 'end_time', 'end_depth_mmd', 'main_sub_activity', 'state', 'remark')
+
+def _match_keys(targets: Iterable[str], keys: Iterable[str], prefer_exact: bool = False) -> Dict[str, str]:
+    keys = list(keys)
+    exact = set(keys) if prefer_exact else ()
+    matched = {}
+    for target in targets:
+        if target in exact:
+            matched[target] = target
+            continue
+        match_key = next((k for k in keys if target in k), None)
+        if match_key:
+            matched[target] = match_key
+    return matched
+
+def _parse_float(value) -> Optional[float]:
+    try:
+        if isinstance(value, str):
+            num_match = _NUMBER_RE.search(value)
+            return float(num_match.group()) if num_match else None
+        return float(value) if value is not None else None
+    except (ValueError, TypeError):
+        return None
+
+def _operation_value(field: str, value):
+    if pd.isna(value):
+        return None
+    return _parse_float(value) if field == 'end_depth_mmd' else value
+
+def _extract_numbers(column: pd.Series) -> pd.Series:
+    extracted = column.astype(str).str.extract(_NUMBER_GROUP_RE, expand=False)
+    return pd.to_numeric(extracted, errors='coerce')
+
+def _nullable_str(column: pd.Series) -> pd.Series:
+    return column.astype(str).astype(object).where(column.notna(), None)
 
 class ReportProcessor:
     def __init__(self, db_config: Optional[DatabaseConfig] = None):
@@ -25,8 +76,8 @@ class ReportProcessor:
         if verbose:
             print(f"Processing PDF: {pdf_path}")
         
-        processor = PDFProcessor(pdf_path)
-        tables, sections, text_data = processor.extract_all_data()
+        with PDFProcessor(pdf_path) as processor:
+            tables, sections, text_data = processor.extract_all_data()
         
         if verbose:
             print(f"  Found {len(sections)} sections")
@@ -47,34 +98,42 @@ class ReportProcessor:
             metadata.wellbore_name = stem
             metadata.report_period = "Unknown"
         
-        report_id = self.db_manager.save_report_metadata(metadata)
-        
-        if verbose:
-            print(f"  Created report: {report_id}")
-        
+        report_id = metadata.report_id
+        now = datetime.now()
+        metadata.created_at = metadata.updated_at = now
+        operations = fluid_records = gas_readings = None
         if 'operations' in tables:
             operations = self._create_operations_from_table(
-                tables['operations'], report_id
+                tables['operations'], report_id, now
             )
-            count = self.db_manager.save_operations(operations)
-            if verbose:
-                print(f"  Saved {count} operations")
-        
         if 'drilling_fluid' in tables:
             fluid_records = self._create_drilling_fluid_from_table(
-                tables['drilling_fluid'], report_id
+                tables['drilling_fluid'], report_id, now
             )
-            count = self.db_manager.save_drilling_fluid(fluid_records)
-            if verbose:
-                print(f"  Saved {count} drilling fluid records")
-        
         if 'gas_reading_information' in tables:
             gas_readings = self._create_gas_readings_from_table(
-                tables['gas_reading_information'], report_id
+                tables['gas_reading_information'], report_id, now
             )
-            count = self.db_manager.save_gas_readings(gas_readings)
+        
+        with self.db_manager.transaction():
+            self.db_manager.save_report_metadata(metadata)
             if verbose:
-                print(f"  Saved {count} gas readings")
+                print(f"  Created report: {report_id}")
+            
+            if operations is not None:
+                count = self.db_manager.save_operations(operations)
+                if verbose:
+                    print(f"  Saved {count} operations")
+            
+            if fluid_records is not None:
+                count = self.db_manager.save_drilling_fluid(fluid_records)
+                if verbose:
+                    print(f"  Saved {count} drilling fluid records")
+            
+            if gas_readings is not None:
+                count = self.db_manager.save_gas_readings(gas_readings)
+                if verbose:
+                    print(f"  Saved {count} gas readings")
         
         if verbose:
             print(f"✅ Successfully processed report: {report_id}")
@@ -90,10 +149,9 @@ class ReportProcessor:
         text_data = text_data or {}
         all_data = {}
         
-        processor = PDFProcessor.__new__(PDFProcessor)
         for key, df in tables.items():
-            if key.startswith('common_') or processor.is_key_value_table(df):
-                data = processor.parse_key_value_table(df)
+            if key.startswith('common_') or is_key_value_table(df):
+                data = parse_key_value_table(df)
                 all_data.update(data)
         
         field_mapping = {
@@ -121,161 +179,88 @@ class ReportProcessor:
             'pressure': 'pressure',
         }
         
-        for extracted_key, model_field in field_mapping.items():
-            match_key = None
-            if extracted_key in all_data:
-                match_key = extracted_key
-            else:
-                for k in all_data.keys():
-                    if extracted_key in k:
-                        match_key = k
-                        break
+        for extracted_key, match_key in _match_keys(field_mapping, all_data, prefer_exact=True).items():
+            model_field = field_mapping[extracted_key]
+            value = all_data[match_key]
+            if model_field in [
+                'elevation_rkb_msl_m', 'water_depth_msl_m', 'dist_drilled_m',
+                'penetration_rate_m_h', 'hole_dia_in', 'formation_strength_g_cm3',
+            ]:
+                value = _parse_float(value)
             
-            if match_key:
-                value = all_data[match_key]
-                if model_field in [
-                    'elevation_rkb_msl_m', 'water_depth_msl_m', 'dist_drilled_m',
-                    'penetration_rate_m_h', 'hole_dia_in', 'formation_strength_g_cm3',
-                ]:
-                    try:
-                        if isinstance(value, str):
-                            num_match = re.search(r'[-+]?\d*\.\d+|\d+', value)
-                            value = float(num_match.group()) if num_match else None
-                        elif value is not None:
-                            value = float(value)
-                    except (ValueError, TypeError, AttributeError):
-                        value = None
-                
-                setattr(metadata, model_field, value)
+            setattr(metadata, model_field, value)
         
         summary_sections = {
             'summary_of_activities': 'summary_activities',
             'summary_of_planned_activities': 'planned_activities',
         }
         
-        for section_key, model_field in summary_sections.items():
-            if section_key in text_data:
-                setattr(metadata, model_field, text_data[section_key])
-            else:
-                for k in text_data.keys():
-                    if section_key in k:
-                        setattr(metadata, model_field, text_data[k])
-                        break
+        for section_key, match_key in _match_keys(summary_sections, text_data, prefer_exact=True).items():
+            setattr(metadata, summary_sections[section_key], text_data[match_key])
         
         return metadata
     
     def _create_operations_from_table(
-        self, df: pd.DataFrame, report_id: str
+        self, df: pd.DataFrame, report_id: str, created_at: Optional[datetime] = None
     ) -> List[OperationRecord]:
-        operations = []
-        processor = PDFProcessor.__new__(PDFProcessor)
-        records = processor.parse_tabular_table(df)
+        created_at = created_at or datetime.now()
+        frame = normalize_tabular_table(df)
+        if frame.empty:
+            return []
+        matched = _match_keys(OPERATION_FIELDS, frame.columns)
+        if not matched:
+            return []
         
-        for record in records:
-            op = OperationRecord(report_id=report_id)
-            column_mapping = {
-                'start_time': 'start_time',
-                'end_time': 'end_time',
-                'end_depth_mmd': 'end_depth_mmd',
-                'main_sub_activity': 'main_sub_activity',
-                'state': 'state',
-                'remark': 'remark',
-            }
-            
-            for col_key, field in column_mapping.items():
-                match_key = None
-                for k in record.keys():
-                    if col_key in k:
-                        match_key = k
-                        break
-                
-                if match_key:
-                    value = record[match_key]
-                    if field == 'end_depth_mmd':
-                        try:
-                            if isinstance(value, str):
-                                num_match = re.search(r'[-+]?\d*\.\d+|\d+', value)
-                                value = float(num_match.group()) if num_match else None
-                            elif value is not None:
-                                value = float(value)
-                            else:
-                                value = None
-                        except (ValueError, TypeError, AttributeError):
-                            value = None
-                    setattr(op, field, value)
-            
-            if op.start_time or op.end_time or op.remark:
-                operations.append(op)
-        
-        return operations
+        fields = list(matched)
+        frame = frame.iloc[:, [frame.columns.get_loc(matched[field]) for field in fields]]
+        operations = (
+            OperationRecord(
+                report_id=report_id,
+                created_at=created_at,
+                **{field: _operation_value(field, value) for field, value in zip(fields, row)},
+            )
+            for row in frame.itertuples(index=False, name=None)
+        )
+        return [op for op in operations if op.start_time or op.end_time or op.remark]
     
     def _create_drilling_fluid_from_table(
-        self, df: pd.DataFrame, report_id: str
+        self, df: pd.DataFrame, report_id: str, created_at: Optional[datetime] = None
     ) -> List[DrillingFluidRecord]:
-        records = []
-        for _, row in df.iterrows():
-            if len(row) < 2:
-                continue
-            param_name = str(row.iloc[0]) if pd.notna(row.iloc[0]) else None
-            if not param_name or len(param_name) < 2:
-                continue
-            record = DrillingFluidRecord(
+        created_at = created_at or datetime.now()
+        if df.shape[1] < 2:
+            return []
+        names = df.iloc[:, 0]
+        df = df[names.notna() & (names.astype(str).str.len() >= 2)]
+        units = _nullable_str(df.iloc[:, 2]) if df.shape[1] > 2 else repeat(None)
+        return [
+            DrillingFluidRecord(
                 report_id=report_id,
-                parameter_name=param_name,
-                value=str(row.iloc[1]) if pd.notna(row.iloc[1]) else None,
-                unit=str(row.iloc[2]) if len(row) > 2 and pd.notna(row.iloc[2]) else None,
+                parameter_name=name,
+                value=value,
+                unit=unit,
+                created_at=created_at,
             )
-            records.append(record)
-        return records
+            for name, value, unit in zip(df.iloc[:, 0].astype(str), _nullable_str(df.iloc[:, 1]), units)
+        ]
     
     def _create_gas_readings_from_table(
-        self, df: pd.DataFrame, report_id: str
+        self, df: pd.DataFrame, report_id: str, created_at: Optional[datetime] = None
     ) -> List[GasReadingRecord]:
-        records = []
-        processor = PDFProcessor.__new__(PDFProcessor)
-        rows = processor.parse_tabular_table(df)
-        for row in rows:
-            record = GasReadingRecord(report_id=report_id)
-            column_mapping = {
-                'depth_m': 'depth_m',
-                'c1': 'c1',
-                'c2': 'c2',
-                'c3': 'c3',
-                'ic4': 'ic4',
-                'nc4': 'nc4',
-                'ic5': 'ic5',
-                'nc5': 'nc5',
-                'total_gas': 'total_gas',
-                'trip_gas': 'trip_gas',
-                'background_gas': 'background_gas',
-                'connection_gas': 'connection_gas',
-            }
-            any_value = False
-            for col_key, field in column_mapping.items():
-                match_key = None
-                for k in row.keys():
-                    if col_key in k:
-                        match_key = k
-                        break
-                
-                if match_key:
-                    value = row[match_key]
-                    try:
-                        if isinstance(value, str):
-                            num_match = re.search(r'[-+]?\d*\.\d+|\d+', value)
-                            value = float(num_match.group()) if num_match else None
-                        elif value is not None:
-                            value = float(value)
-                        else:
-                            value = None
-                        if value is not None:
-                            any_value = True
-                    except (ValueError, TypeError, AttributeError):
-                        value = None
-                    setattr(record, field, value)
-            if any_value:
-                records.append(record)
-        return records
+        created_at = created_at or datetime.now()
+        frame = normalize_tabular_table(df)
+        if frame.empty:
+            return []
+        matched = _match_keys(GAS_READING_FIELDS, frame.columns)
+        if not matched:
+            return []
+        
+        numbers = pd.DataFrame({field: _extract_numbers(frame[key]) for field, key in matched.items()})
+        numbers = numbers[numbers.notna().any(axis=1)]
+        numbers = numbers.astype(object).where(numbers.notna(), None)
+        return [
+            GasReadingRecord(report_id=report_id, created_at=created_at, **values)
+            for values in numbers.to_dict(orient='records')
+        ]
     
     def get_report_summary(self, report_id: str) -> Dict:
         metadata = self.db_manager.get_report_by_id(report_id)